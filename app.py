@@ -4,20 +4,31 @@
 from __future__ import annotations
 
 import argparse
+import email.utils
+import functools
 import hashlib
 import io
 import json
 import mimetypes
+import multiprocessing
 import os
+import queue
 import re
+import selectors
+import shutil
+import socket
+import threading
 import time
 import zipfile
+import zlib
 from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from http import HTTPStatus
 import http.server
 from pathlib import Path, PurePosixPath
-from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 from urllib.parse import parse_qs, unquote, urlparse
 
 from PIL import Image, ImageOps, ExifTags
@@ -31,6 +42,16 @@ except ImportError:  # pragma: no cover - pymongo may be absent in some environm
     ASCENDING = 1
     DESCENDING = -1
 
+try:  # Optional dependency for faster JSON encoding
+    import orjson
+except ImportError:  # pragma: no cover - fall back to the standard library encoder
+    orjson = None
+
+try:  # Optional dependency for Brotli-compressed JSON responses
+    import brotli
+except ImportError:  # pragma: no cover - gzip is always available
+    brotli = None
+
 SUPPORTED_EXTENSIONS = {
     ".jpg",
     ".jpeg",
@@ -42,6 +63,8 @@ SUPPORTED_EXTENSIONS = {
     ".webp",
 }
 
+_LOWERED_EXTENSIONS = {ext.lower() for ext in SUPPORTED_EXTENSIONS}
+
 IGNORED_DIRECTORIES = {".Trash-1000"}
 DEFAULT_HOST = "0.0.0.0"
 DEFAULT_PORT = 8765
@@ -51,21 +74,37 @@ DEFAULT_MONGO_DB = "barrydb"
 DEFAULT_MONGO_COLLECTION = "images"
 STATIC_DIR = Path(__file__).with_name("static")
 THUMBNAIL_DEFAULT_SIZE = 320
+THUMBNAIL_WORKERS = os.cpu_count() or 1
 THUMBNAIL_CACHE_DIR = Path(__file__).with_name(".thumbnail_cache")
 THUMBNAIL_PLACEHOLDER_PATH = STATIC_DIR / "thumbnail-placeholder.svg"
+# Longest gap between full revalidations while top-level folder mtimes are unchanged.
 IMAGE_CACHE_TTL_SECONDS = 30
 EXIF_CACHE_TTL_SECONDS = 300
+HIERARCHY_DB_CACHE_TTL_SECONDS = 60
+SERVER_WORKERS = max(16, 2 * (os.cpu_count() or 1))
+KEEP_ALIVE_TIMEOUT_SECONDS = 30
 
 _IMAGE_CACHE: Dict[str, object] = {
     "root": None,
-    "generated": 0.0,
-    "paths": [],
+    "generation": 0,
+    "paths": ([], []),
+    "views": {},
     "hierarchy_root": None,
-    "hierarchy_generated": 0.0,
+    "hierarchy_generation": 0,
     "hierarchy": None,
+    "index": None,
+    "search_index": None,
+    "fingerprint": None,
+    "checked": 0.0,
 }
 
 _EXIF_CACHE: Dict[str, Tuple[float, List[Dict[str, str]]]] = {}
+_HIERARCHY_DB_CACHE: Dict[bool, Tuple[float, Dict[str, object]]] = {}
+_ZIP_FOLDER_CACHE: Tuple[Optional[Dict[str, object]], Dict[str, Dict[str, object]], Dict[Tuple[str, ...], str]] = (
+    None,
+    {},
+    {},
+)
 EXIF_TAGS = {tag_id: tag_name for tag_id, tag_name in ExifTags.TAGS.items()}
 GPS_TAGS = {
     tag_id: tag_name for tag_id, tag_name in getattr(ExifTags, "GPSTAGS", {}).items()
@@ -81,6 +120,10 @@ _EXIF_IGNORED_TAGS = {
 }
 
 MONGO_COLLECTION: Optional["Collection"] = None
+_THUMBNAIL_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_THUMBNAIL_PLACEHOLDER: Optional[bytes] = None
+_FINGERPRINT_BUILDER = hashlib.blake2b
+_THUMBNAIL_EXECUTOR_LOCK = threading.Lock()
 
 
 def set_database_collection(collection: Optional["Collection"]) -> None:
@@ -88,6 +131,110 @@ def set_database_collection(collection: Optional["Collection"]) -> None:
     MONGO_COLLECTION = collection
 
 
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+# Override with IMAGE_VIEWER_COPY_BUFFER (e.g. 65536 for slow clients).
+FILE_COPY_BUFFER_SIZE = int(os.environ.get("IMAGE_VIEWER_COPY_BUFFER", 1024 * 1024))
+JSON_COMPRESS_MIN_BYTES = 1024
+
+
+def dumps_json(value: object) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(value).encode("utf-8")
+
+
+def loads_json(data: bytes) -> object:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+
+def iter_json_chunks(payload: Dict[str, object], chunk_size: int = JSON_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    buffer = bytearray(b"{")
+    for position, (key, value) in enumerate(payload.items()):
+        if position:
+            buffer += b","
+        buffer += dumps_json(str(key)) + b":"
+        if isinstance(value, dict):
+            buffer += b"{"
+            for item_position, (item_key, item_value) in enumerate(value.items()):
+                if item_position:
+                    buffer += b","
+                buffer += dumps_json(str(item_key)) + b":" + dumps_json(item_value)
+                if len(buffer) >= chunk_size:
+                    yield bytes(buffer)
+                    buffer.clear()
+            buffer += b"}"
+        elif isinstance(value, (list, tuple)):
+            buffer += b"["
+            for item_position, item in enumerate(value):
+                if item_position:
+                    buffer += b","
+                buffer += dumps_json(item)
+                if len(buffer) >= chunk_size:
+                    yield bytes(buffer)
+                    buffer.clear()
+            buffer += b"]"
+        else:
+            buffer += dumps_json(value)
+    buffer += b"}"
+    yield bytes(buffer)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def json_compressor(encoding: str):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=4)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(1, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+class ChunkedWriter(io.RawIOBase):
+    """Write-only stream that frames each write as an HTTP/1.1 chunk."""
+
+    def __init__(self, wfile) -> None:
+        super().__init__()
+        self._wfile = wfile
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        size = len(data)
+        if size and self._wfile is not None:
+            self._wfile.write(b"%x\r\n%s\r\n" % (size, data))
+        return size
+
+    def finish(self) -> None:
+        self._wfile.write(b"0\r\n\r\n")
+
+    def abort(self) -> None:
+        # Drop anything still buffered above us instead of writing to a failed socket.
+        self._wfile = None
+
+
 mimetypes.add_type("application/javascript", ".js")
 mimetypes.add_type("image/svg+xml", ".svg")
 
@@ -108,35 +255,221 @@ def resolve_relative_path(root: Path, relative: str) -> Path:
     return full_path
 
 
+def _scan_directory(path: str) -> Tuple[List[os.DirEntry], List[os.DirEntry]]:
+    subdirs: List[os.DirEntry] = []
+    images: List[os.DirEntry] = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not is_ignored_name(entry.name):
+                        subdirs.append(entry)
+                elif (
+                    os.path.splitext(entry.name)[1].lower() in _LOWERED_EXTENSIONS
+                    and entry.is_file()
+                ):
+                    images.append(entry)
+            except OSError:
+                continue
+    subdirs.sort(key=lambda entry: entry.name.lower())
+    images.sort(key=lambda entry: entry.name.lower())
+    return subdirs, images
+
+
 def iter_directories(path: Path) -> Iterator[Path]:
-    for entry in sorted(path.iterdir(), key=lambda p: p.name.lower()):
-        if entry.is_dir() and not is_ignored_name(entry.name):
-            yield entry
+    subdirs, _images = _scan_directory(str(path))
+    for entry in subdirs:
+        yield Path(entry.path)
 
 
 def iter_images(path: Path) -> Iterator[Path]:
-    lowered_exts = {ext.lower() for ext in SUPPORTED_EXTENSIONS}
-    for entry in sorted(path.iterdir(), key=lambda p: p.name.lower()):
-        if entry.is_file() and entry.suffix.lower() in lowered_exts:
-            yield entry
+    for entry in iter_image_entries(path):
+        yield Path(entry.path)
+
+
+def iter_image_entries(path: Path) -> Iterator[os.DirEntry]:
+    _subdirs, images = _scan_directory(str(path))
+    yield from images
 
 
 def iter_images_recursive(path: Path, limit: Optional[int] = None) -> Iterator[Path]:
-    lowered_exts = {ext.lower() for ext in SUPPORTED_EXTENSIONS}
     count = 0
-    for current_root, dirs, files in os.walk(path):
-        dirs[:] = [d for d in dirs if not is_ignored_name(d)]
-        dirs.sort(key=str.lower)
-        for name in sorted(files, key=str.lower):
-            if Path(name).suffix.lower() in lowered_exts:
-                yield Path(current_root) / name
-                count += 1
-                if limit is not None and count >= limit:
-                    return
-
-
-def guess_date_hint(relative_path: Path) -> Optional[str]:
-    for part in relative_path.parts[::-1]:
+    stack = [str(path)]
+    while stack:
+        try:
+            subdirs, images = _scan_directory(stack.pop())
+        except OSError:
+            continue
+        for entry in images:
+            yield Path(entry.path)
+            count += 1
+            if limit is not None and count >= limit:
+                return
+        stack.extend(entry.path for entry in reversed(subdirs) if not entry.is_symlink())
+
+
+class IndexSnapshot(NamedTuple):
+    """Immutable build of an ``ImageIndex``."""
+
+    root: Path
+    generation: int
+    paths: Tuple[str, ...]
+    directories: Tuple[str, ...]
+    dates: Dict[str, Tuple[bool, int]]
+    subtree_end: Dict[str, int]
+    dirs_with_images: frozenset
+    first_nested_image: Optional[str]
+
+    def date_of(self, relative: str) -> Tuple[bool, int]:
+        return self.dates[relative]
+
+
+class ImageIndex:
+    """Image listing below ``root`` that re-lists only directories whose mtime changed."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.snapshot = IndexSnapshot(root, 0, (), (), {}, {}, frozenset(), None)
+        self._dir_mtimes: Dict[str, int] = {}
+        self._listings: Dict[str, Tuple[List[str], List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> IndexSnapshot:
+        with self._lock:
+            changed = False
+            seen: set[str] = set()
+            stack = [""]
+            while stack:
+                rel = stack.pop()
+                full = os.path.join(self.root, rel) if rel else str(self.root)
+                try:
+                    mtime_ns = os.stat(full).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(rel)
+                listing = self._listings.get(rel)
+                if listing is None or self._dir_mtimes.get(rel) != mtime_ns:
+                    listing = self._list_directory(full)
+                    self._listings[rel] = listing
+                    self._dir_mtimes[rel] = mtime_ns
+                    changed = True
+                prefix = f"{rel}/" if rel else ""
+                stack.extend(prefix + name for name in listing[0])
+
+            for rel in [rel for rel in self._listings if rel not in seen]:
+                del self._listings[rel]
+                self._dir_mtimes.pop(rel, None)
+                changed = True
+
+            if changed:
+                self._rebuild()
+            return self.snapshot
+
+    @staticmethod
+    def _list_directory(path: str) -> Tuple[List[str], List[str]]:
+        try:
+            subdirs, images = _scan_directory(path)
+        except OSError:
+            return [], []
+        return (
+            [entry.name for entry in subdirs if not entry.is_symlink()],
+            [entry.name for entry in images],
+        )
+
+    def _rebuild(self) -> None:
+        previous = self.snapshot
+        paths: List[str] = []
+        directories: List[str] = []
+        dates: Dict[str, Tuple[bool, int]] = {}
+        subtree_start: Dict[str, int] = {}
+        subtree_end: Dict[str, int] = {}
+        stack: List[Tuple[str, bool]] = [("", False)]
+        while stack:
+            rel, leaving = stack.pop()
+            if leaving:
+                subtree_end[rel] = len(paths)
+                continue
+            listing = self._listings.get(rel)
+            if listing is None:
+                continue
+            subtree_start[rel] = len(paths)
+            stack.append((rel, True))
+            subdirs, images = listing
+            prefix = f"{rel}/" if rel else ""
+            for name in images:
+                relative = prefix + name
+                paths.append(relative)
+                dates[relative] = previous.dates.get(relative) or _extract_date_value_str(relative)
+            children = [prefix + name for name in subdirs]
+            directories.extend(children)
+            stack.extend((child, False) for child in reversed(children))
+
+        self.snapshot = IndexSnapshot(
+            root=self.root,
+            generation=previous.generation + 1,
+            paths=tuple(paths),
+            directories=tuple(directories),
+            dates=dates,
+            subtree_end=subtree_end,
+            dirs_with_images=frozenset(
+                rel for rel, end in subtree_end.items() if end > subtree_start[rel]
+            ),
+            first_nested_image=next((path for path in paths if "/" in path), None),
+        )
+
+
+def get_image_index(root: Path) -> IndexSnapshot:
+    index = _IMAGE_CACHE.get("index")
+    if not isinstance(index, ImageIndex) or index.root != root:
+        index = ImageIndex(root)
+        _IMAGE_CACHE["index"] = index
+    return index.refresh()
+
+
+def _tree_fingerprint(root: Path) -> Tuple[Tuple[str, int], ...]:
+    try:
+        stamps = [("", os.stat(root).st_mtime_ns)]
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False) and not is_ignored_name(entry.name):
+                    stamps.append((entry.name, entry.stat(follow_symlinks=False).st_mtime_ns))
+    except OSError:
+        return ()
+    stamps.sort()
+    return tuple(stamps)
+
+
+def fresh_image_index(root: Path) -> IndexSnapshot:
+    """Return the index, refreshing only when top-level mtimes change or the TTL lapses."""
+    fingerprint = _tree_fingerprint(root)
+    index = _IMAGE_CACHE.get("index")
+    if (
+        isinstance(index, ImageIndex)
+        and index.root == root
+        and index.snapshot.generation
+        and fingerprint
+        and fingerprint == _IMAGE_CACHE.get("fingerprint")
+        and time.time() - float(_IMAGE_CACHE.get("checked", 0.0)) < IMAGE_CACHE_TTL_SECONDS
+    ):
+        return index.snapshot
+    snapshot = get_image_index(root)
+    _IMAGE_CACHE["fingerprint"] = fingerprint
+    _IMAGE_CACHE["checked"] = time.time()
+    return snapshot
+
+
+def built_image_index(root: Path) -> Optional[IndexSnapshot]:
+    index = _IMAGE_CACHE.get("index")
+    if not isinstance(index, ImageIndex) or index.root != root or not index.snapshot.generation:
+        return None
+    return fresh_image_index(root)
+
+
+@functools.lru_cache(maxsize=500_000)
+def _guess_date_hint_str(relative_path: str) -> Optional[str]:
+    for part in reversed(relative_path.split("/")):
+        if not part:
+            continue
         normalized = part.replace("-", "_")
         if len(normalized) == 4 and normalized.isdigit():
             return normalized
@@ -376,17 +709,22 @@ def _fetch_database_documents() -> List[Dict[str, object]]:
             doc["relative"] = _relative_path_from_id(doc.get("_id"))
     return documents
 
+def _rel_posix(root: Path, path: Path) -> str:
+    if path == root:
+        return ""
+    return path.relative_to(root).as_posix()
+
+
 def build_breadcrumbs(root: Path, target: Path) -> List[Dict[str, str]]:
     breadcrumbs = [{"name": "Home", "path": ""}]
     if target == root:
         return breadcrumbs
-    relative = target.relative_to(root)
-    accumulated = Path()
-    for segment in relative.parts:
-        accumulated = accumulated / segment
+    accumulated = ""
+    for segment in target.relative_to(root).parts:
+        accumulated = f"{accumulated}/{segment}" if accumulated else segment
         breadcrumbs.append({
             "name": segment,
-            "path": str(accumulated).replace(os.sep, "/"),
+            "path": accumulated,
         })
     return breadcrumbs
 
@@ -398,6 +736,22 @@ def first_image_in_tree(path: Path) -> Optional[Path]:
 
 
 def next_folder_first_image(root: Path, target: Path) -> Optional[Path]:
+    index = built_image_index(root)
+    if index is None:
+        return _next_folder_first_image_walk(root, target)
+    relative = _rel_posix(root, target)
+    if relative:
+        end = index.subtree_end.get(relative)
+        if end is None:
+            return _next_folder_first_image_walk(root, target)
+        if end < len(index.paths):
+            return root / index.paths[end]
+    if index.first_nested_image is None:
+        return None
+    return root / index.first_nested_image
+
+
+def _next_folder_first_image_walk(root: Path, target: Path) -> Optional[Path]:
     if target == root:
         for candidate in iter_directories(root):
             found = first_image_in_tree(candidate)
@@ -429,19 +783,20 @@ def next_folder_first_image(root: Path, target: Path) -> Optional[Path]:
                 return found
         return None
 
-    return next_folder_first_image(root, parent)
+    return _next_folder_first_image_walk(root, parent)
 
 
 def directory_payload(root: Path, target: Path) -> Dict[str, object]:
-    relative = (
-        ""
-        if target == root
-        else str(target.relative_to(root)).replace(os.sep, "/")
-    )
+    relative = _rel_posix(root, target)
+    prefix = f"{relative}/" if relative else ""
+    index = built_image_index(root)
     directories = []
     for directory in iter_directories(target):
-        rel_path = str(directory.relative_to(root)).replace(os.sep, "/")
-        has_images = any(iter_images_recursive(directory, limit=1))
+        rel_path = prefix + directory.name
+        if index is not None and rel_path in index.subtree_end:
+            has_images = rel_path in index.dirs_with_images
+        else:
+            has_images = any(iter_images_recursive(directory, limit=1))
         directories.append(
             {
                 "name": directory.name,
@@ -451,15 +806,15 @@ def directory_payload(root: Path, target: Path) -> Dict[str, object]:
         )
 
     images = []
-    for image_path in iter_images(target):
-        rel_path = str(image_path.relative_to(root)).replace(os.sep, "/")
-        date_hint = guess_date_hint(image_path.relative_to(root))
+    for entry in iter_image_entries(target):
+        rel_path = prefix + entry.name
+        date_hint = _guess_date_hint_str(rel_path)
         images.append(
             {
-                "name": image_path.name,
+                "name": entry.name,
                 "path": rel_path,
                 "dateHint": date_hint,
-                "size": image_path.stat().st_size,
+                "size": entry.stat().st_size,
             }
         )
 
@@ -472,83 +827,142 @@ def directory_payload(root: Path, target: Path) -> Dict[str, object]:
         "images": images,
         "totalImages": len(images),
         "nextFolderImage": (
-            str(next_image.relative_to(root)).replace(os.sep, "/") if next_image else None
+            _rel_posix(root, next_image) if next_image else None
         ),
     }
 
 
-def search_directories(root: Path, query: str, limit: int = 50) -> List[Dict[str, str]]:
-    normalized_query = _normalize_search_text(query)
-    if not normalized_query:
-        return []
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2) if " " not in text[i : i + 3]}
+
+
+def _add_postings(postings: Dict[str, set[int]], entry_id: int, haystack: str) -> None:
+    for gram in _trigrams(haystack):
+        postings.setdefault(gram, set()).add(entry_id)
+
+
+def _candidate_ids(postings: Dict[str, set[int]], total: int, tokens: Sequence[str]) -> List[int]:
+    grams: set[str] = set()
+    for token in tokens:
+        grams |= _trigrams(token)
+    if not grams:
+        return list(range(total))
+    posting_sets = sorted((postings.get(gram, set()) for gram in grams), key=len)
+    candidates = set(posting_sets[0])
+    for posting in posting_sets[1:]:
+        if not candidates:
+            break
+        candidates &= posting
+    return sorted(candidates)
 
-    query_tokens = [token for token in normalized_query.split(" ") if token]
-    if not query_tokens:
-        return []
 
-    results: List[Dict[str, str]] = []
-    seen_paths: set[str] = set()
+class SearchIndex:
+    """Trigram postings over directory and per-folder image haystacks."""
 
-    for current_root, dirs, _files in os.walk(root):
-        dirs[:] = [d for d in dirs if not is_ignored_name(d)]
-        for directory in sorted(dirs, key=str.lower):
-            dir_path = Path(current_root) / directory
-            relative = str(dir_path.relative_to(root)).replace(os.sep, "/")
-            hint = guess_date_hint(dir_path.relative_to(root))
-            has_date, date_value = _extract_date_value(Path(relative))
+    def __init__(self, root: Path, index: IndexSnapshot) -> None:
+        self.root = root
+        self.generation = index.generation
+        self.directories: List[Tuple[str, str, str]] = []
+        self.directory_postings: Dict[str, set[int]] = {}
+        self.image_groups: List[Tuple[str, str, List[str]]] = []
+        self.image_postings: Dict[str, set[int]] = {}
+
+        for relative in index.directories:
+            hint = _guess_date_hint_str(relative)
+            has_date, date_value = _extract_date_value_str(relative)
+            name = PurePosixPath(relative).name
             haystack = _build_search_haystack(
-                (relative, directory, hint or ""),
+                (relative, name, hint or ""),
                 date_value if has_date else None,
             )
-            if haystack and all(token in haystack for token in query_tokens):
+            if haystack:
+                _add_postings(self.directory_postings, len(self.directories), haystack)
+                self.directories.append((relative, name, haystack))
+
+        group_ids: Dict[str, int] = {}
+        for relative in index.paths:
+            rel_path = PurePosixPath(relative)
+            parent_name = rel_path.parent.name or root.name
+            hint = _guess_date_hint_str(relative)
+            has_date, date_value = index.date_of(relative)
+            haystack = _build_search_haystack(
+                (relative, rel_path.name, parent_name, hint or ""),
+                date_value if has_date else None,
+            )
+            if not haystack:
+                continue
+            directory_path = rel_path.parent.as_posix()
+            group_id = group_ids.get(directory_path)
+            if group_id is None:
+                group_id = group_ids[directory_path] = len(self.image_groups)
+                self.image_groups.append((directory_path, parent_name, []))
+            self.image_groups[group_id][2].append(haystack)
+            _add_postings(self.image_postings, group_id, haystack)
+
+    def search(self, query_tokens: Sequence[str], limit: int) -> List[Dict[str, str]]:
+        results: List[Dict[str, str]] = []
+        seen_paths: set[str] = set()
+
+        for entry_id in _candidate_ids(self.directory_postings, len(self.directories), query_tokens):
+            relative, name, haystack = self.directories[entry_id]
+            if all(token in haystack for token in query_tokens):
                 if relative not in seen_paths:
                     seen_paths.add(relative)
-                    results.append({"name": directory, "path": relative})
+                    results.append({"name": name, "path": relative})
                 if len(results) >= limit:
                     return results
 
-    if len(results) < limit:
-        for image_path in iter_images_recursive(root):
-            relative = str(image_path.relative_to(root)).replace(os.sep, "/")
-            hint = guess_date_hint(image_path.relative_to(root))
-            has_date, date_value = _extract_date_value(Path(relative))
-            haystack = _build_search_haystack(
-                (
-                    relative,
-                    image_path.name,
-                    image_path.parent.name,
-                    hint or "",
-                ),
-                date_value if has_date else None,
-            )
-            if haystack and all(token in haystack for token in query_tokens):
-                directory_path = str(image_path.parent.relative_to(root)).replace(os.sep, "/")
-                if directory_path not in seen_paths:
-                    seen_paths.add(directory_path)
-                    results.append({"name": image_path.parent.name, "path": directory_path})
+        for group_id in _candidate_ids(self.image_postings, len(self.image_groups), query_tokens):
+            directory_path, parent_name, haystacks = self.image_groups[group_id]
+            if directory_path in seen_paths:
+                continue
+            if any(all(token in haystack for token in query_tokens) for haystack in haystacks):
+                seen_paths.add(directory_path)
+                results.append({"name": parent_name, "path": directory_path})
                 if len(results) >= limit:
                     break
-    return results
-
-
-def _extract_date_value(rel_path: Path) -> tuple[bool, int]:
-    text = str(rel_path)
-    tokens = [tok for tok in re.split(r"\D+", text) if tok]
-    for idx, token in enumerate(tokens):
-        if len(token) == 4 and token.startswith(("19", "20")):
-            year = token
-            month = "00"
-            day = "00"
-            if idx + 1 < len(tokens) and len(tokens[idx + 1]) == 2:
-                candidate_month = int(tokens[idx + 1])
-                if 1 <= candidate_month <= 12:
-                    month = f"{candidate_month:02d}"
-                    if idx + 2 < len(tokens) and len(tokens[idx + 2]) == 2:
-                        candidate_day = int(tokens[idx + 2])
-                        if 1 <= candidate_day <= 31:
-                            day = f"{candidate_day:02d}"
-            return True, int(f"{year}{month}{day}")
-    return False, 0
+        return results
+
+
+def search_directories(root: Path, query: str, limit: int = 50) -> List[Dict[str, str]]:
+    normalized_query = _normalize_search_text(query)
+    if not normalized_query:
+        return []
+
+    query_tokens = [token for token in normalized_query.split(" ") if token]
+    if not query_tokens:
+        return []
+
+    index = fresh_image_index(root)
+    search_index = _IMAGE_CACHE.get("search_index")
+    if (
+        not isinstance(search_index, SearchIndex)
+        or search_index.root != root
+        or search_index.generation != index.generation
+    ):
+        search_index = SearchIndex(root, index)
+        _IMAGE_CACHE["search_index"] = search_index
+    return search_index.search(query_tokens, limit)
+
+
+# First 4-digit 19xx/20xx run, optionally followed by the next two 2-digit runs.
+_DATE_VALUE_PATTERN = re.compile(
+    r"(?<!\d)((?:19|20)\d\d)(?!\d)(?:\D+(\d\d)(?!\d)(?:\D+(\d\d)(?!\d))?)?"
+)
+
+
+@functools.lru_cache(maxsize=500_000)
+def _extract_date_value_str(text: str) -> tuple[bool, int]:
+    match = _DATE_VALUE_PATTERN.search(text)
+    if not match:
+        return False, 0
+    year, month, day = match.groups()
+    value = int(year) * 10000
+    if month and 1 <= int(month) <= 12:
+        value += int(month) * 100
+        if day and 1 <= int(day) <= 31:
+            value += int(day)
+    return True, value
 
 
 DATE_TOKEN_PATTERN = re.compile(r"(?P<year>(?:19|20)\d{2})(?P<sep>[-_/]?)(?P<month>\d{2})(?P=sep)?(?P<day>\d{2})")
@@ -817,14 +1231,52 @@ def get_exif_metadata(root: Path, relative: str) -> List[Dict[str, str]]:
     return fields
 
 
+ZIP_DEFLATE_EXTENSIONS = {".bmp", ".tif", ".tiff"}
+_ZIP_UNSAFE_PATTERN = re.compile(r"[\\/:*?\"<>|]+")
+_ZIP_UNSAFE_TRANSLATION = str.maketrans({char: "_" for char in '\\/:*?"<>|\0'})
+
+
+@functools.lru_cache(maxsize=4096)
 def sanitize_zip_component(component: str, fallback: str = "item") -> str:
-    cleaned = re.sub(r"[\\/:*?\"<>|]+", "_", component).strip()
-    cleaned = cleaned.replace("\0", "_")
+    cleaned = component.translate(_ZIP_UNSAFE_TRANSLATION)
+    if cleaned != component and _ZIP_UNSAFE_PATTERN.search(component):
+        cleaned = _ZIP_UNSAFE_PATTERN.sub("_", component).replace("\0", "_")
+    cleaned = cleaned.strip()
     if not cleaned:
         return fallback
     return cleaned
 
 
+def zip_folder_names(root: Path, relatives: Sequence[str]) -> List[str]:
+    global _ZIP_FOLDER_CACHE
+    hierarchy = build_hierarchy(root)
+    cached_hierarchy, group_lookup, folders = _ZIP_FOLDER_CACHE
+    # build_hierarchy returns the same object until the tree changes.
+    if cached_hierarchy is not hierarchy:
+        group_lookup = {}
+        for group in hierarchy.get("top_groups", []):
+            for subgroup in group.get("subgroups", []):
+                group_lookup[subgroup.get("key")] = subgroup
+        folders = {}
+        _ZIP_FOLDER_CACHE = (hierarchy, group_lookup, folders)
+
+    names: List[str] = []
+    for relative_path in relatives:
+        parts = Path(relative_path).parts[:2]
+        folder = folders.get(parts)
+        if folder is None:
+            if not parts:
+                folder = "images"
+            else:
+                group_key = "/".join(parts)
+                metadata = group_lookup.get(group_key, {})
+                label = metadata.get("formattedLabel") or metadata.get("label") or parts[-1]
+                folder = sanitize_zip_component(str(label), fallback="images")
+            folders[parts] = folder
+        names.append(folder)
+    return names
+
+
 def _is_year_label(text: object) -> bool:
     if not isinstance(text, str):
         return False
@@ -860,7 +1312,7 @@ def _sorted_image_paths_db(order: str) -> List[str]:
     dated_paths = []
     undated_paths = []
     for path in ordered:
-        has_date, _ = _extract_date_value(PurePosixPath(path))
+        has_date, _ = _extract_date_value_str(path)
         if has_date:
             dated_paths.append(path)
         else:
@@ -869,19 +1321,20 @@ def _sorted_image_paths_db(order: str) -> List[str]:
     return dated_paths + undated_paths
 
 
-def sorted_image_paths(root: Path, order: str = "desc") -> List[str]:
+def _sorted_image_view(root: Path, order: str) -> Tuple[List[str], Dict[str, int]]:
     if using_database():
-        return _sorted_image_paths_db(order)
-    cache_root = _IMAGE_CACHE["root"]
-    now = time.time()
-    if cache_root == root and now - float(_IMAGE_CACHE["generated"]) < IMAGE_CACHE_TTL_SECONDS:
-        cache_paths = list(_IMAGE_CACHE["paths"])
+        paths = _sorted_image_paths_db(order)
+        return paths, {path: idx for idx, path in enumerate(paths)}
+    normalized = "asc" if order == "asc" else "desc"
+    index = fresh_image_index(root)
+    if _IMAGE_CACHE["root"] == root and _IMAGE_CACHE["generation"] == index.generation:
+        dated_paths, undated_paths = _IMAGE_CACHE["paths"]
+        views = _IMAGE_CACHE["views"]
     else:
         dated: List[tuple[int, str]] = []
         undated: List[str] = []
-        for image_path in iter_images_recursive(root):
-            relative = str(image_path.relative_to(root)).replace(os.sep, "/")
-            has_date, value = _extract_date_value(Path(relative))
+        for relative in index.paths:
+            has_date, value = index.date_of(relative)
             if has_date:
                 dated.append((value, relative))
             else:
@@ -889,41 +1342,44 @@ def sorted_image_paths(root: Path, order: str = "desc") -> List[str]:
 
         dated.sort(key=lambda item: (item[0], item[1].lower()))
         undated.sort(key=lambda path: path.lower())
-        cache_paths = [path for _value, path in dated] + undated
+        dated_paths = [path for _value, path in dated]
+        undated_paths = undated
+        views = {}
 
         _IMAGE_CACHE["root"] = root
-        _IMAGE_CACHE["generated"] = now
-        _IMAGE_CACHE["paths"] = cache_paths
+        _IMAGE_CACHE["generation"] = index.generation
+        _IMAGE_CACHE["paths"] = (dated_paths, undated_paths)
+        _IMAGE_CACHE["views"] = views
+
+    view = views.get(normalized)
+    if view is None:
+        if normalized == "asc":
+            ordered = dated_paths + undated_paths
+        else:
+            ordered = dated_paths[::-1] + undated_paths
+        view = (ordered, {path: idx for idx, path in enumerate(ordered)})
+        views[normalized] = view
+    return view
 
-    if order == "asc":
-        return list(cache_paths)
 
-    dated_paths = []
-    undated_paths = []
-    for path in cache_paths:
-        has_date, _ = _extract_date_value(Path(path))
-        if has_date:
-            dated_paths.append(path)
-        else:
-            undated_paths.append(path)
-    dated_paths.reverse()
-    return dated_paths + undated_paths
+def sorted_image_paths(root: Path, order: str = "desc") -> List[str]:
+    if using_database():
+        return _sorted_image_paths_db(order)
+    paths, _positions = _sorted_image_view(root, order)
+    return list(paths)
 
 
 def timeline_sections(
     root: Path, cursor: Optional[str], limit: int, order: str = "desc"
 ) -> Dict[str, object]:
-    paths = sorted_image_paths(root, order)
+    paths, positions = _sorted_image_view(root, order)
     if not paths:
         return {"sections": [], "nextCursor": None}
 
     start_index = 0
     if cursor:
         cursor = cursor.replace(os.sep, "/")
-        try:
-            start_index = paths.index(cursor) + 1
-        except ValueError:
-            start_index = 0
+        start_index = positions.get(cursor, -1) + 1
 
     slice_paths = paths[start_index : start_index + limit]
     if not slice_paths:
@@ -935,7 +1391,7 @@ def timeline_sections(
 
     for rel_path_str in slice_paths:
         rel_path = Path(rel_path_str)
-        hint = guess_date_hint(rel_path)
+        hint = _guess_date_hint_str(rel_path_str)
         label = hint or rel_path.parent.name or "Unknown"
         if label != current_label:
             if current_items:
@@ -974,11 +1430,11 @@ def _build_manifest_entry(
             date_value = iso_value
             has_date = bool(doc.get("date_specific", True))
     if not date_value:
-        extracted_has_date, extracted_value = _extract_date_value(rel_path)
+        extracted_has_date, extracted_value = _extract_date_value_str(relative)
         if extracted_has_date:
             has_date = True
             date_value = extracted_value
-    date_hint = guess_date_hint(Path(rel_path)) or subgroup_label
+    date_hint = _guess_date_hint_str(relative) or subgroup_label
     manifest_entry = {
         "name": rel_path.name,
         "path": relative,
@@ -1140,6 +1596,19 @@ def _order_groups(top_groups: Sequence[Dict[str, object]], order: str) -> List[D
 
 
 def _build_hierarchy_db(include_images: bool = True) -> Dict[str, object]:
+    # Callers treat the cached result as read-only.
+    now = time.time()
+    for key in (True,) if include_images else (True, False):
+        cached = _HIERARCHY_DB_CACHE.get(key)
+        if cached and now - cached[0] < HIERARCHY_DB_CACHE_TTL_SECONDS:
+            return cached[1]
+
+    result = _aggregate_hierarchy_db(include_images)
+    _HIERARCHY_DB_CACHE[include_images] = (now, result)
+    return result
+
+
+def _aggregate_hierarchy_db(include_images: bool) -> Dict[str, object]:
     documents = _fetch_database_documents()
     top_groups, location_counts, images_by_group = _accumulate_documents(
         documents,
@@ -1218,21 +1687,19 @@ def random_pool_payload(
 def build_hierarchy(root: Path) -> Dict[str, object]:
     if using_database():
         return _build_hierarchy_db()
-    cache_root = _IMAGE_CACHE.get("hierarchy_root")
-    now = time.time()
+    index = fresh_image_index(root)
     cached_hierarchy = _IMAGE_CACHE.get("hierarchy")
     if (
         cached_hierarchy
-        and cache_root == root
-        and now - float(_IMAGE_CACHE.get("hierarchy_generated", 0.0)) < IMAGE_CACHE_TTL_SECONDS
+        and _IMAGE_CACHE.get("hierarchy_root") == root
+        and _IMAGE_CACHE.get("hierarchy_generation") == index.generation
     ):
         return cached_hierarchy
 
     top_groups: Dict[str, Dict[str, object]] = {}
     images_by_group: Dict[str, List[Dict[str, object]]] = {}
 
-    for image_path in iter_images_recursive(root):
-        relative_str = str(image_path.relative_to(root)).replace(os.sep, "/")
+    for relative_str in index.paths:
         rel_path = Path(relative_str)
         parts = rel_path.parts
         if not parts:
@@ -1247,8 +1714,8 @@ def build_hierarchy(root: Path) -> Dict[str, object]:
             subgroup_key = top_key
             subgroup_label = top_label
 
-        has_date, date_value = _extract_date_value(rel_path)
-        date_hint = guess_date_hint(rel_path) or subgroup_label
+        has_date, date_value = index.date_of(relative_str)
+        date_hint = _guess_date_hint_str(relative_str) or subgroup_label
 
         image_item = {
             "name": rel_path.name,
@@ -1332,13 +1799,33 @@ def build_hierarchy(root: Path) -> Dict[str, object]:
         key=lambda item: (item["dateValue"], item["key"]), reverse=True
     )
 
+    images_desc: Dict[str, Tuple[Dict[str, object], ...]] = {}
+    for group_key, image_list in images_by_group.items():
+        images_desc[group_key] = tuple(
+            {
+                "name": item["name"],
+                "path": item["path"],
+                "dateHint": item["dateHint"],
+                "dateValue": item["dateValue"],
+            }
+            for item in image_list
+        )
+
     hierarchy = {
         "top_groups": top_group_list,
         "images_by_group": images_by_group,
+        "ordered_groups_desc": _order_groups(top_group_list, "desc"),
+        "ordered_groups_asc": _order_groups(top_group_list, "asc"),
+        "images_desc": images_desc,
+        "images_asc": {key: items[::-1] for key, items in images_desc.items()},
+        "image_positions": {
+            key: {item["path"]: idx for idx, item in enumerate(items)}
+            for key, items in images_desc.items()
+        },
     }
 
     _IMAGE_CACHE["hierarchy_root"] = root
-    _IMAGE_CACHE["hierarchy_generated"] = now
+    _IMAGE_CACHE["hierarchy_generation"] = index.generation
     _IMAGE_CACHE["hierarchy"] = hierarchy
     return hierarchy
 
@@ -1348,11 +1835,15 @@ def hierarchy_payload(root: Path, order: str) -> Dict[str, object]:
     if normalized not in {"asc", "desc"}:
         normalized = "desc"
 
-    if using_database():
-        data = _build_hierarchy_db(include_images=True)
-    else:
+    if not using_database():
         data = build_hierarchy(root)
+        return {
+            "groups": data[f"ordered_groups_{normalized}"],
+            "imagesByGroup": data[f"images_{normalized}"],
+            "order": normalized,
+        }
 
+    data = _build_hierarchy_db(include_images=True)
     top_groups = data["top_groups"]
     ordered_groups = _order_groups(top_groups, normalized)
     images_by_group = data.get("images_by_group", {}) or {}
@@ -1387,7 +1878,7 @@ def groups_payload(root: Path, order: str) -> Dict[str, object]:
         top_groups = data.get("top_groups", [])
     else:
         data = build_hierarchy(root)
-        top_groups = data["top_groups"]
+        return {"groups": data[f"ordered_groups_{normalized}"], "order": normalized}
 
     ordered_groups = _order_groups(top_groups, normalized)
     return {"groups": ordered_groups, "order": normalized}
@@ -1408,38 +1899,28 @@ def group_images_payload(
         return _group_images_payload_db(group_key, cursor, limit, normalized)
 
     data = build_hierarchy(root)
-    images = data["images_by_group"].get(group_key)
-    if images is None:
+    sequence = data[f"images_{normalized}"].get(group_key)
+    if sequence is None:
         return {"images": [], "nextCursor": None}
 
-    sequence = images if normalized == "desc" else list(reversed(images))
     start_index = 0
     if cursor:
         cursor = cursor.replace(os.sep, "/")
-        for idx, item in enumerate(sequence):
-            if item["path"] == cursor:
-                start_index = idx + 1
-                break
+        position = data["image_positions"][group_key].get(cursor)
+        if position is not None:
+            if normalized == "asc":
+                position = len(sequence) - 1 - position
+            start_index = position + 1
 
     slice_items = sequence[start_index : start_index + limit]
     if not slice_items:
         return {"images": [], "nextCursor": None}
 
-    response_images = [
-        {
-            "name": item["name"],
-            "path": item["path"],
-            "dateHint": item.get("dateHint"),
-            "dateValue": item.get("dateValue"),
-        }
-        for item in slice_items
-    ]
-
     next_cursor = None
     if start_index + len(slice_items) < len(sequence):
         next_cursor = slice_items[-1]["path"]
 
-    return {"images": response_images, "nextCursor": next_cursor}
+    return {"images": list(slice_items), "nextCursor": next_cursor}
 
 
 def _group_images_payload_db(
@@ -1505,13 +1986,23 @@ def _group_images_payload_db(
     return {"images": response_images, "nextCursor": next_cursor}
 
 
-def warm_cache(root: Path) -> None:
+def warm_cache(root: Path, warm_thumbnails: bool = False) -> None:
     """Populate caches eagerly so first request isn't delayed."""
+    _extract_date_value_str.cache_clear()
+    _guess_date_hint_str.cache_clear()
     try:
+        fresh_image_index(root)
         sorted_image_paths(root, order="desc")
         build_hierarchy(root)
     except Exception as exc:  # noqa: BLE001 - cache warm failures shouldn't block startup
         print(f"[WARN] Failed to warm caches: {exc}")
+    if warm_thumbnails:
+        threading.Thread(
+            target=warm_thumbnail_cache,
+            args=(root,),
+            name="thumbnail-warmer",
+            daemon=True,
+        ).start()
 
 
 def extract_exif_thumbnail(image_path: Path) -> Optional[bytes]:
@@ -1527,9 +2018,19 @@ def extract_exif_thumbnail(image_path: Path) -> Optional[bytes]:
 
 
 def thumbnail_cache_key(image_path: Path, max_size: int) -> str:
-    stat = image_path.stat()
-    fingerprint = f"{image_path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{max_size}"
-    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+    stat = os.stat(image_path)
+    fingerprint = f"{stat.st_dev}|{stat.st_ino}|{stat.st_size}|{stat.st_mtime_ns}|{max_size}"
+    return _FINGERPRINT_BUILDER(fingerprint.encode("ascii"), digest_size=16).hexdigest()
+
+
+def placeholder_thumbnail() -> Optional[bytes]:
+    global _THUMBNAIL_PLACEHOLDER
+    if _THUMBNAIL_PLACEHOLDER is None:
+        try:
+            _THUMBNAIL_PLACEHOLDER = THUMBNAIL_PLACEHOLDER_PATH.read_bytes()
+        except OSError:
+            return None
+    return _THUMBNAIL_PLACEHOLDER
 
 
 def thumbnail_cache_path(image_path: Path, max_size: int) -> Path:
@@ -1537,20 +2038,26 @@ def thumbnail_cache_path(image_path: Path, max_size: int) -> Path:
     return THUMBNAIL_CACHE_DIR / f"{key}.jpg"
 
 
-def generate_thumbnail(image_path: Path, max_size: int) -> Optional[tuple[bytes, str]]:
+def cached_thumbnail(image_path: Path, max_size: int) -> Optional[tuple[bytes, str]]:
     exif_thumb = extract_exif_thumbnail(image_path)
     if exif_thumb:
         return exif_thumb, "image/jpeg"
+    try:
+        return thumbnail_cache_path(image_path, max_size).read_bytes(), "image/jpeg"
+    except OSError:
+        return None
 
-    cache_file = thumbnail_cache_path(image_path, max_size)
-    if cache_file.exists():
-        return cache_file.read_bytes(), "image/jpeg"
 
+def generate_thumbnail(image_path: Path | str, max_size: int) -> Optional[tuple[bytes, str]]:
+    image_path = Path(image_path)
+    cache_file = thumbnail_cache_path(image_path, max_size)
     try:
         with Image.open(image_path) as img:
+            if img.format == "JPEG":
+                img.draft("RGB", (max_size * 2, max_size * 2))
             img = ImageOps.exif_transpose(img)
             thumb = img.copy()
-            thumb.thumbnail((max_size, max_size), Image.LANCZOS)
+            thumb.thumbnail((max_size, max_size), Image.LANCZOS, reducing_gap=2.0)
             if thumb.mode == "RGBA":
                 background = Image.new("RGB", thumb.size, (16, 16, 16))
                 background.paste(thumb, mask=thumb.split()[3])
@@ -1565,17 +2072,103 @@ def generate_thumbnail(image_path: Path, max_size: int) -> Optional[tuple[bytes,
 
     data = buffer.getvalue()
     THUMBNAIL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    cache_file.write_bytes(data)
+    # Handler threads read the cache directly, so never expose a partial file.
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_bytes(data)
+    os.replace(tmp_file, cache_file)
     return data, "image/jpeg"
 
 
+def thumbnail_executor() -> ProcessPoolExecutor:
+    global _THUMBNAIL_EXECUTOR
+    with _THUMBNAIL_EXECUTOR_LOCK:
+        if _THUMBNAIL_EXECUTOR is None:
+            # Workers come from a clean forkserver, never a fork of a threaded handler.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _THUMBNAIL_EXECUTOR = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS, mp_context=context)
+        return _THUMBNAIL_EXECUTOR
+
+
+def reset_thumbnail_executor(broken: ProcessPoolExecutor) -> None:
+    global _THUMBNAIL_EXECUTOR
+    with _THUMBNAIL_EXECUTOR_LOCK:
+        if _THUMBNAIL_EXECUTOR is broken:
+            _THUMBNAIL_EXECUTOR = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def render_thumbnail(image_path: str, max_size: int) -> Optional[tuple[bytes, str]]:
+    executor = thumbnail_executor()
+    try:
+        return executor.submit(generate_thumbnail, image_path, max_size).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. a decoder crash); start a fresh pool for later requests.
+        print(f"[WARN] Thumbnail worker pool broke while rendering {image_path}; restarting it")
+        reset_thumbnail_executor(executor)
+        return None
+
+
+def shutdown_thumbnail_executor() -> None:
+    global _THUMBNAIL_EXECUTOR
+    with _THUMBNAIL_EXECUTOR_LOCK:
+        if _THUMBNAIL_EXECUTOR is not None:
+            _THUMBNAIL_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+            _THUMBNAIL_EXECUTOR = None
+
+
+def warm_thumbnail_cache(root: Path, max_size: int = THUMBNAIL_DEFAULT_SIZE) -> None:
+    # Keep at most half the workers busy so interactive thumbnails never queue behind the warmer.
+    window = max(1, THUMBNAIL_WORKERS // 2)
+    started = time.time()
+    generated = 0
+    pending: set = set()
+    try:
+        for relative in fresh_image_index(root).paths:
+            image_path = os.path.join(root, relative)
+            if cached_thumbnail(Path(image_path), max_size) is not None:
+                continue
+            if len(pending) >= window:
+                _done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            executor = thumbnail_executor()
+            try:
+                pending.add(executor.submit(generate_thumbnail, image_path, max_size))
+            except BrokenProcessPool:
+                reset_thumbnail_executor(executor)
+                continue
+            generated += 1
+        wait(pending)
+    except Exception as exc:  # noqa: BLE001 - warming is best effort
+        print(f"[WARN] Failed to warm thumbnail cache: {exc}")
+        return
+    print(f"Warmed {generated} thumbnails in {time.time() - started:.1f}s")
+
+
 class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = KEEP_ALIVE_TIMEOUT_SECONDS
     root_path: Path = DEFAULT_ROOT
     mongo_collection: Optional["Collection"] = None
     mongo_client: Optional["MongoClient"] = None
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory=str(STATIC_DIR), **kwargs)
+    def __init__(self, request, client_address, server):
+        if isinstance(server, ImageServer):
+            # ImageServer drives handle_one_request() itself between idle waits.
+            self.directory = str(STATIC_DIR)
+            self.request, self.client_address, self.server = request, client_address, server
+            self.setup()
+            return
+        super().__init__(request, client_address, server, directory=str(STATIC_DIR))
+
+    def handle_one_request(self) -> None:
+        self.connection.settimeout(self.timeout)
+        super().handle_one_request()
+
+    def parse_request(self) -> bool:
+        # The idle timeout only covers reading the request head, not the transfer.
+        parsed = super().parse_request()
+        self.connection.settimeout(None)
+        return parsed
 
     def do_GET(self) -> None:  # noqa: N802 - standard library signature
         parsed = urlparse(self.path)
@@ -1663,10 +2256,13 @@ class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
         if not target.exists() or not target.is_file():
             raise FileNotFoundError
 
-        result = generate_thumbnail(target, max_size)
+        result = cached_thumbnail(target, max_size)
+        if result is None:
+            result = render_thumbnail(str(target), max_size)
         if result is None:
-            if THUMBNAIL_PLACEHOLDER_PATH.exists():
-                self.send_file(THUMBNAIL_PLACEHOLDER_PATH)
+            placeholder = placeholder_thumbnail()
+            if placeholder is not None:
+                self.send_binary(placeholder, "image/svg+xml", cache_control="no-cache")
             else:
                 self.send_error(HTTPStatus.NOT_FOUND, "Thumbnail unavailable")
             return
@@ -1678,6 +2274,7 @@ class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
         try:
             length = int(self.headers.get("Content-Length", "0") or 0)
         except ValueError:
+            self.close_connection = True
             self.send_json({"error": "Invalid Content-Length"}, status=HTTPStatus.BAD_REQUEST)
             return
 
@@ -1688,12 +2285,13 @@ class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
         try:
             raw_body = self.rfile.read(length)
         except Exception as exc:  # noqa: BLE001 - stream errors
+            self.close_connection = True
             self.send_json({"error": f"Unable to read request body: {exc}"}, status=HTTPStatus.BAD_REQUEST)
             return
 
         try:
-            payload = json.loads(raw_body.decode("utf-8"))
-        except json.JSONDecodeError as exc:
+            payload = loads_json(raw_body)
+        except ValueError as exc:
             self.send_json({"error": f"Invalid JSON: {exc}"}, status=HTTPStatus.BAD_REQUEST)
             return
 
@@ -1746,51 +2344,19 @@ class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_header("Content-Length", str(target.stat().st_size))
                 self.end_headers()
                 with target.open("rb") as file_obj:
-                    while True:
-                        chunk = file_obj.read(64_000)
-                        if not chunk:
-                            break
-                        self.wfile.write(chunk)
+                    self.write_file_body(file_obj)
             except BrokenPipeError:
                 self.log_message("Client closed connection while downloading %s", target)
             return
 
-        hierarchy = build_hierarchy(self.root_path)
-        group_lookup: Dict[str, Dict[str, object]] = {}
-        for group in hierarchy.get("top_groups", []):
-            for subgroup in group.get("subgroups", []):
-                group_lookup[subgroup.get("key")] = subgroup
-
-        def group_folder(relative_path: str) -> str:
-            parts = Path(relative_path).parts
-            if not parts:
-                return "images"
-            if len(parts) >= 2:
-                group_key = f"{parts[0]}/{parts[1]}"
-                fallback_label = parts[1]
-            else:
-                group_key = parts[0]
-                fallback_label = parts[0]
-            metadata = group_lookup.get(group_key, {})
-            label = metadata.get("formattedLabel") or metadata.get("label") or fallback_label
-            return sanitize_zip_component(str(label), fallback="images")
-
-        folder_sequence = [group_folder(relative) for relative, _ in resolved]
+        folder_sequence = zip_folder_names(self.root_path, [relative for relative, _ in resolved])
         unique_folders = list(dict.fromkeys(folder_sequence))
         zip_base = unique_folders[0] if len(unique_folders) == 1 else "selected-images"
         zip_name = sanitize_zip_component(zip_base, fallback="images") + ".zip"
 
-        buffer = io.BytesIO()
-        try:
-            with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
-                for (relative, target), folder in zip(resolved, folder_sequence):
-                    arcname = f"{folder}/{target.name}"
-                    archive.write(target, arcname=arcname)
-        except Exception as exc:  # noqa: BLE001 - surface zip errors
-            self.send_json({"error": f"Failed to build archive: {exc}"}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
-            return
-
-        data = buffer.getvalue()
+        # Length is unknown up front: chunked on HTTP/1.1, close-delimited otherwise.
+        chunked = self.can_send_chunked()
+        body = None
         try:
             self.send_response(HTTPStatus.OK)
             self.send_header("Content-Type", "application/zip")
@@ -1798,11 +2364,44 @@ class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
                 "Content-Disposition",
                 f'attachment; filename="{zip_name}"',
             )
-            self.send_header("Content-Length", str(len(data)))
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            else:
+                self.send_header("Connection", "close")
+                self.close_connection = True
             self.end_headers()
-            self.wfile.write(data)
+            if chunked:
+                body = io.BufferedWriter(ChunkedWriter(self.wfile), JSON_STREAM_CHUNK_SIZE)
+            else:
+                body = self.wfile
+            with zipfile.ZipFile(body, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for (relative, target), folder in zip(resolved, folder_sequence):
+                    arcname = f"{folder}/{target.name}"
+                    member = zipfile.ZipInfo.from_file(target, arcname=arcname)
+                    if target.suffix.lower() in ZIP_DEFLATE_EXTENSIONS:
+                        member.compress_type = zipfile.ZIP_DEFLATED
+                    else:
+                        member.compress_type = zipfile.ZIP_STORED
+                    with target.open("rb") as source, archive.open(member, "w") as destination:
+                        shutil.copyfileobj(source, destination, FILE_COPY_BUFFER_SIZE)
+            if chunked:
+                body.flush()
+                body.raw.finish()
+                body.detach()
         except BrokenPipeError:
+            self.close_connection = True
+            self.abort_chunked_body(body)
             self.log_message("Client closed connection while downloading archive")
+        except Exception as exc:  # noqa: BLE001 - headers are already sent
+            self.close_connection = True
+            self.abort_chunked_body(body)
+            self.log_message("Failed to stream archive: %s", exc)
+
+    @staticmethod
+    def abort_chunked_body(body) -> None:
+        if isinstance(body, io.BufferedWriter):
+            body.raw.abort()
+            body.close()
 
     def api_search(self, params: Dict[str, List[str]]) -> None:
         query = params.get("query", [""])[0]
@@ -1817,7 +2416,7 @@ class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
         target = resolve_relative_path(self.root_path, resolved_relative)
         if not target.exists() or not target.is_file():
             raise FileNotFoundError
-        normalized = str(target.relative_to(self.root_path)).replace(os.sep, "/")
+        normalized = _rel_posix(self.root_path, target)
         fields = get_exif_metadata(self.root_path, normalized)
         self.send_json({"path": normalized, "fields": fields})
 
@@ -1833,7 +2432,7 @@ class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
         if order not in {"asc", "desc"}:
             order = "desc"
         payload = hierarchy_payload(self.root_path, order)
-        self.send_json(payload)
+        self.send_json_stream(payload)
 
     def api_group_images(self, params: Dict[str, List[str]]) -> None:
         group_key = params.get("group", [""])[0]
@@ -1877,48 +2476,252 @@ class ImageRequestHandler(http.server.SimpleHTTPRequestHandler):
         super().do_GET()
 
     def send_json(self, payload: Dict[str, object], status: HTTPStatus = HTTPStatus.OK) -> None:
-        data = json.dumps(payload).encode("utf-8")
+        data = dumps_json(payload)
+        encoding = None
+        if len(data) >= JSON_COMPRESS_MIN_BYTES:
+            encoding = negotiate_encoding(self.headers.get("Accept-Encoding", ""))
+        if encoding:
+            compress, finish = json_compressor(encoding)
+            data = compress(data) + finish()
         try:
             self.send_response(status)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.send_header("Content-Length", str(len(data)))
             self.send_header("Cache-Control", "no-store")
+            self.send_header("Vary", "Accept-Encoding")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
             self.end_headers()
             self.wfile.write(data)
         except BrokenPipeError:
             self.log_message("Client closed connection while sending JSON response")
 
-    def send_binary(self, data: bytes, content_type: str) -> None:
+    def can_send_chunked(self) -> bool:
+        return self.request_version >= "HTTP/1.1" and self.protocol_version >= "HTTP/1.1"
+
+    def send_json_stream(self, payload: Dict[str, object], status: HTTPStatus = HTTPStatus.OK) -> None:
+        chunked = self.can_send_chunked()
+        encoding = negotiate_encoding(self.headers.get("Accept-Encoding", ""))
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Vary", "Accept-Encoding")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            else:
+                self.send_header("Connection", "close")
+                self.close_connection = True
+            self.end_headers()
+            body = ChunkedWriter(self.wfile) if chunked else self.wfile
+            if encoding:
+                compress, finish = json_compressor(encoding)
+                for chunk in iter_json_chunks(payload):
+                    body.write(compress(chunk))
+                body.write(finish())
+            else:
+                for chunk in iter_json_chunks(payload):
+                    body.write(chunk)
+            if chunked:
+                body.finish()
+        except BrokenPipeError:
+            self.close_connection = True
+            self.log_message("Client closed connection while streaming JSON response")
+        except Exception as exc:  # noqa: BLE001 - headers are already sent
+            self.close_connection = True
+            self.log_message("Failed to stream JSON response: %s", exc)
+
+    def etag_matches(self, etag: str) -> bool:
+        header = self.headers.get("If-None-Match")
+        if not header:
+            return False
+        wanted = etag[2:] if etag.startswith("W/") else etag
+        for candidate in header.split(","):
+            candidate = candidate.strip()
+            if candidate == "*":
+                return True
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate == wanted:
+                return True
+        return False
+
+    def send_not_modified(self, etag: str, cache_control: str) -> None:
+        try:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+        except BrokenPipeError:
+            self.log_message("Client closed connection while sending 304 response")
+
+    def send_binary(
+        self, data: bytes, content_type: str, cache_control: str = "max-age=86400"
+    ) -> None:
+        etag = f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}"'
+        if self.etag_matches(etag):
+            self.send_not_modified(etag, cache_control)
+            return
         try:
             self.send_response(HTTPStatus.OK)
             self.send_header("Content-Type", content_type)
             self.send_header("Content-Length", str(len(data)))
-            self.send_header("Cache-Control", "max-age=86400")
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("ETag", etag)
             self.end_headers()
             self.wfile.write(data)
         except BrokenPipeError:
             self.log_message("Client closed connection while sending binary response")
 
-    def send_file(self, path: Path) -> None:
+    def send_file(self, path: Path, cache_control: str = "max-age=86400") -> None:
         content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        stat_result = path.stat()
+        etag = f'W/"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        if self.etag_matches(etag):
+            self.send_not_modified(etag, cache_control)
+            return
         try:
             self.send_response(HTTPStatus.OK)
             self.send_header("Content-Type", content_type)
-            self.send_header("Content-Length", str(path.stat().st_size))
+            self.send_header("Content-Length", str(stat_result.st_size))
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", email.utils.formatdate(stat_result.st_mtime, usegmt=True))
             self.end_headers()
             with path.open("rb") as file_obj:
-                while True:
-                    chunk = file_obj.read(64_000)
-                    if not chunk:
-                        break
-                    self.wfile.write(chunk)
+                self.write_file_body(file_obj)
         except BrokenPipeError:
             self.log_message("Client closed connection while streaming file %s", path)
 
+    def write_file_body(self, file_obj) -> None:
+        self.wfile.flush()
+        # TLS sockets and platforms without os.sendfile copy through a buffer.
+        if hasattr(os, "sendfile") and type(self.connection) is socket.socket:
+            self.connection.sendfile(file_obj)
+        else:
+            shutil.copyfileobj(file_obj, self.wfile, FILE_COPY_BUFFER_SIZE)
+
     def log_message(self, format: str, *args) -> None:  # noqa: A003 - match base signature
         print(f"[HTTP] {self.address_string()} - {format % args}")
 
 
+class ImageServer(http.server.ThreadingHTTPServer):
+    """Serve requests from a fixed worker pool; sockets wait in a selector until readable."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers: int = SERVER_WORKERS) -> None:
+        super().__init__(server_address, handler_class)
+        self._pending: "queue.Queue[Optional[http.server.BaseHTTPRequestHandler]]" = queue.Queue()
+        self._parking: "queue.Queue[http.server.BaseHTTPRequestHandler]" = queue.Queue()
+        self._closing = False
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self._wakeup_writer.setblocking(False)
+        self._selector.register(self._wakeup_reader, selectors.EVENT_READ)
+        self._workers = [
+            threading.Thread(target=self._serve_pending, name=f"http-worker-{index}", daemon=True)
+            for index in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+        threading.Thread(target=self._watch_idle, name="http-idle", daemon=True).start()
+
+    def process_request(self, request, client_address) -> None:
+        self._park(self.RequestHandlerClass(request, client_address, self))
+
+    def _serve_pending(self) -> None:
+        while True:
+            handler = self._pending.get()
+            if handler is None:
+                return
+            try:
+                while True:
+                    handler.close_connection = True
+                    handler.handle_one_request()
+                    if handler.close_connection:
+                        break
+                    if not self._has_buffered_input(handler):
+                        self._park(handler)
+                        handler = None
+                        break
+            except Exception:
+                self.handle_error(handler.request, handler.client_address)
+            if handler is not None:
+                self._close_handler(handler)
+
+    @staticmethod
+    def _has_buffered_input(handler) -> bool:
+        handler.connection.setblocking(False)
+        try:
+            return bool(handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            handler.connection.settimeout(handler.timeout)
+
+    def _park(self, handler) -> None:
+        self._parking.put(handler)
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            self._wakeup_writer.send(b"\0")
+        except OSError:
+            pass
+
+    def _watch_idle(self) -> None:
+        parked: Dict[object, float] = {}
+        while not self._closing:
+            while True:
+                try:
+                    handler = self._parking.get_nowait()
+                except queue.Empty:
+                    break
+                self._selector.register(handler.connection, selectors.EVENT_READ, handler)
+                parked[handler] = time.monotonic()
+            for key, _ in self._selector.select(timeout=1.0):
+                if key.fileobj is self._wakeup_reader:
+                    try:
+                        while self._wakeup_reader.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                self._selector.unregister(key.fileobj)
+                del parked[key.data]
+                self._pending.put(key.data)
+            deadline = time.monotonic() - KEEP_ALIVE_TIMEOUT_SECONDS
+            for handler, since in list(parked.items()):
+                if since < deadline:
+                    self._selector.unregister(handler.connection)
+                    del parked[handler]
+                    self._close_handler(handler)
+        for handler in parked:
+            self._close_handler(handler)
+        self._selector.close()
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
+    def _close_handler(self, handler) -> None:
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._closing = True
+        self._wake()
+        for _ in self._workers:
+            self._pending.put(None)
+
+
 def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run the Barry Image Viewer web server.")
     parser.add_argument(
@@ -1952,6 +2755,11 @@ def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Disable MongoDB integration and fall back to filesystem scanning.",
     )
+    parser.add_argument(
+        "--warm-thumbnails",
+        action="store_true",
+        help="Pre-generate default-size thumbnails for every image in the background on startup.",
+    )
     return parser.parse_args(argv)
 
 
@@ -2000,10 +2808,11 @@ def main() -> None:
     handler_class.mongo_collection = collection
     set_database_collection(collection)
 
+    thumbnail_executor()
     print("Warming caches...")
-    warm_cache(root_path)
+    warm_cache(root_path, warm_thumbnails=args.warm_thumbnails)
 
-    server = http.server.ThreadingHTTPServer((args.host, args.port), handler_class)
+    server = ImageServer((args.host, args.port), handler_class)
     print(f"Serving images from {root_path}")
     print(f"Open http://{args.host}:{args.port} in your browser")
     try:
@@ -2012,6 +2821,7 @@ def main() -> None:
         print("\nShutting down server")
     finally:
         server.server_close()
+        shutdown_thumbnail_executor()
 
 
 if __name__ == "__main__":
@@ -2,31 +2,49 @@
 """Populate MongoDB with image metadata from a photo directory (insert-only)."""
 
 import argparse
+import json
 import logging
+import multiprocessing
 import os
 import re
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, Optional, Tuple
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 from pymongo import MongoClient
 from pymongo.collection import Collection
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.write_concern import WriteConcern
+from pymongo.errors import BulkWriteError, ServerSelectionTimeoutError
 from PIL import Image, ExifTags, UnidentifiedImageError
 from PIL.TiffImagePlugin import IFDRational
+from urllib3.util.retry import Retry
 
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".gif", ".bmp", ".heic", ".webp"}
-DATE_SEGMENT_PATTERNS = [
-    re.compile(r"^(?P<year>19\d{2}|20\d{2})[_-](?P<month>0[1-9]|1[0-2])[_-](?P<day>0[1-9]|[12]\d|3[01])$"),
-    re.compile(r"^(?P<year>19\d{2}|20\d{2})(?P<month>0[1-9]|1[0-2])(?P<day>0[1-9]|[12]\d|3[01])$"),
-    re.compile(r"^(?P<year>19\d{2}|20\d{2})-(?P<month>0[1-9]|1[0-2])-(?P<day>0[1-9]|[12]\d|3[01])$"),
-]
+EXIFLESS_EXTENSIONS = {".gif", ".bmp"}
+DATE_SEGMENT_PATTERN = re.compile(
+    r"^(?P<year>19\d{2}|20\d{2})"
+    r"(?:[_-](?P<separated_month>0[1-9]|1[0-2])[_-]|(?P<month>0[1-9]|1[0-2]))"
+    r"(?P<day>0[1-9]|[12]\d|3[01])$"
+)
 YEAR_SEGMENT_PATTERN = re.compile(r"^(?P<year>19\d{2}|20\d{2})$")
 MONTH_SEGMENT_PATTERN = re.compile(r"^(0[1-9]|1[0-2])$")
 DAY_SEGMENT_PATTERN = re.compile(r"^(0[1-9]|[12]\d|3[01])$")
+_EXIF_DATETIME_RE = re.compile(r"(\d{4})([:-])(\d{2})\2(\d{2}) (\d{2}):(\d{2}):(\d{2})", re.ASCII)
+_OFFSET_RE = re.compile(r"([+-])([01]\d|2[0-3]):?([0-5]\d)$")
+INSERT_BATCH_SIZE = 500
+DUPLICATE_KEY_ERROR = 11000
+GEOCODE_PRECISION = 4
+DEFAULT_GEOCODE_CACHE = Path("~/.cache/barry_geocode.json")
+NOMINATIM_USER_AGENT = "BarryImageLoader/1.0"
+
+_GEOCODE_CACHE: Dict[str, Dict] = {}
+_HTTP_SESSION: Optional[requests.Session] = None
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +81,29 @@ def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Process files and directories that start with a dot.",
     )
+    parser.add_argument(
+        "--geocode-cache",
+        type=Path,
+        default=DEFAULT_GEOCODE_CACHE,
+        help="JSON file used to persist reverse-geocode results between runs.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes used to read EXIF data (default: CPU count).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INSERT_BATCH_SIZE,
+        help=f"Documents per insert_many call (default: {INSERT_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--unacknowledged",
+        action="store_true",
+        help="Insert with write concern w=0 for fast initial loads (write errors are not reported).",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -77,36 +118,44 @@ class PathDateInfo:
     date_value: Optional[datetime]
 
 
-def iter_image_files(root: Path, extensions: Iterable[str], include_hidden: bool) -> Iterator[Path]:
+def iter_image_files(root: Path, extensions: Iterable[str], include_hidden: bool) -> Iterator[Tuple[Path, int]]:
     root = root.resolve()
     normalized_exts = {ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in extensions}
-    for path in root.rglob("*"):
-        if not path.is_file():
-            continue
-        if not include_hidden and any(part.startswith(".") for part in path.relative_to(root).parts):
-            continue
-        if path.suffix.lower() not in normalized_exts:
-            continue
-        yield path
+    pending = [str(root)]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if not include_hidden and entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in normalized_exts and entry.is_file():
+                        try:
+                            size = entry.stat().st_size
+                        except OSError:
+                            continue
+                        yield Path(entry.path), size
+        except OSError as exc:
+            logger.debug("Skipping unreadable directory: %s", exc)
 
 
 def detect_path_date(relative_path: Path) -> PathDateInfo:
     parts = relative_path.parts
 
     for part in parts:
-        for pattern in DATE_SEGMENT_PATTERNS:
-            match = pattern.match(part)
-            if match:
-                try:
-                    date_value = datetime(
-                        int(match.group("year")),
-                        int(match.group("month")),
-                        int(match.group("day")),
-                        tzinfo=timezone.utc,
-                    )
-                    return PathDateInfo(True, date_value)
-                except ValueError:
-                    continue
+        match = DATE_SEGMENT_PATTERN.match(part)
+        if match:
+            try:
+                date_value = datetime(
+                    int(match.group("year")),
+                    int(match.group("separated_month") or match.group("month")),
+                    int(match.group("day")),
+                    tzinfo=timezone.utc,
+                )
+                return PathDateInfo(True, date_value)
+            except ValueError:
+                continue
 
     for idx in range(len(parts) - 2):
         if YEAR_SEGMENT_PATTERN.match(parts[idx]) and \
@@ -126,23 +175,47 @@ def detect_path_date(relative_path: Path) -> PathDateInfo:
     return PathDateInfo(False, None)
 
 
+def _decode_exif_bytes(value: bytes) -> str:
+    try:
+        return value.decode("utf-8", errors="replace")
+    except Exception:
+        return value.hex()
+
+
+def _rational_to_float(value: IFDRational) -> Optional[float]:
+    return float(value) if value.denominator != 0 else None
+
+
+def _normalize_exif_sequence(value) -> List[object]:
+    return [_normalize_exif_value(item) for item in value]
+
+
+_EXIF_VALUE_CONVERTERS = {
+    bytes: _decode_exif_bytes,
+    IFDRational: _rational_to_float,
+    tuple: _normalize_exif_sequence,
+    list: _normalize_exif_sequence,
+}
+
+
 def _normalize_exif_value(value):
-    if isinstance(value, bytes):
-        try:
-            return value.decode("utf-8", errors="replace")
-        except Exception:
-            return value.hex()
-    if isinstance(value, IFDRational):
-        return float(value) if value.denominator != 0 else None
-    if isinstance(value, (tuple, list)):
-        return [_normalize_exif_value(v) for v in value]
+    convert = _EXIF_VALUE_CONVERTERS.get(type(value))
+    if convert is not None:
+        return convert(value)
+    if isinstance(value, (bytes, IFDRational, tuple, list)):
+        for base, convert in _EXIF_VALUE_CONVERTERS.items():
+            if isinstance(value, base):
+                return convert(value)
     return value
 
 
 def extract_exif(path: Path) -> Dict[str, object]:
+    if path.suffix.lower() in EXIFLESS_EXTENSIONS:
+        return {}
     try:
         with Image.open(path) as img:
-            exif_raw = img._getexif() or {}
+            getexif = getattr(img, "_getexif", None)
+            exif_raw = (getexif() if getexif is not None else None) or {}
     except (FileNotFoundError, UnidentifiedImageError):
         return {}
     except Exception:
@@ -169,18 +242,27 @@ def convert_exif_datetime_to_iso_utc(exif: Dict[str, object]) -> Optional[str]:
     if not raw_datetime:
         return None
 
-    for fmt in ("%Y:%m:%d %H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+    parsed = None
+    match = _EXIF_DATETIME_RE.fullmatch(raw_datetime)
+    if match:
+        year, _, month, day, hour, minute, second = match.groups()
         try:
-            parsed = datetime.strptime(raw_datetime, fmt)
-            break
+            parsed = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
         except ValueError:
-            parsed = None
+            return None
+    else:
+        for fmt in ("%Y:%m:%d %H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+            try:
+                parsed = datetime.strptime(raw_datetime, fmt)
+                break
+            except ValueError:
+                parsed = None
     if parsed is None:
         return None
 
     offset_str = exif.get("OffsetTimeOriginal") or exif.get("OffsetTime")
     if isinstance(offset_str, str):
-        m = re.match(r"([+-])([01]\d|2[0-3]):?([0-5]\d)$", offset_str)
+        m = _OFFSET_RE.match(offset_str)
         if m:
             sign, hours, minutes = m.groups()
             delta = timedelta(hours=int(hours), minutes=int(minutes))
@@ -213,17 +295,69 @@ def _extract_gps_coords(exif: Dict[str, object]) -> Optional[Tuple[float, float,
         return None
 
 
+def http_session() -> requests.Session:
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        session = requests.Session()
+        session.headers["User-Agent"] = NOMINATIM_USER_AGENT
+        retries = Retry(total=3, backoff_factor=1, status_forcelist=(502, 503, 504), raise_on_status=False)
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=retries))
+        _HTTP_SESSION = session
+    return _HTTP_SESSION
+
+
+def load_geocode_cache(path: Path) -> None:
+    path = path.expanduser()
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable geocode cache %s: %s", path, exc)
+        return
+    if isinstance(data, dict):
+        _GEOCODE_CACHE.update(data)
+        logger.info("Loaded %d cached geocode results.", len(data))
+
+
+def save_geocode_cache(path: Path) -> None:
+    path = path.expanduser()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(_GEOCODE_CACHE, handle)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.warning("Could not save geocode cache %s: %s", path, exc)
+
+
 def reverse_geocode(lat: float, lon: float) -> Tuple[Optional[Dict], Optional[str]]:
+    lat = round(lat, GEOCODE_PRECISION)
+    lon = round(lon, GEOCODE_PRECISION)
+    key = f"{lat},{lon}"
+    cached = _GEOCODE_CACHE.get(key)
+    if cached is not None:
+        return cached, None
+
+    osm, err = _reverse_geocode_request(lat, lon)
+    if osm is not None:
+        _GEOCODE_CACHE[key] = osm
+    return osm, err
+
+
+def _reverse_geocode_request(lat: float, lon: float) -> Tuple[Optional[Dict], Optional[str]]:
     url = "https://nominatim.openstreetmap.org/reverse"
     try:
-        r = requests.get(url, params={
+        r = http_session().get(url, params={
             "lat": lat,
             "lon": lon,
             "format": "json",
             "addressdetails": 1,
             "namedetails": 1,
             "extratags": 1,
-        }, headers={"User-Agent": "BarryImageLoader/1.0"}, timeout=10)
+        }, timeout=10)
         if r.status_code == 429:
             time.sleep(1)
             return None, "rate_limited"
@@ -240,13 +374,16 @@ def connect_collection(uri: str, db_name: str, collection_name: str) -> Collecti
     return client[db_name][collection_name]
 
 
-def build_document(file_path: Path, root: Path, exif: Dict[str, object]) -> Dict[str, object]:
+def build_document(
+    file_path: Path, root: Path, exif: Dict[str, object], file_size: Optional[int] = None
+) -> Dict[str, object]:
     pseudo_path = f"/{file_path.relative_to(root).as_posix()}"
-    file_stat = file_path.stat()
+    if file_size is None:
+        file_size = file_path.stat().st_size
 
     doc = {
         "_id": pseudo_path,
-        "file_size_bytes": file_stat.st_size,
+        "file_size_bytes": file_size,
         "exif": exif,
     }
 
@@ -259,6 +396,18 @@ def build_document(file_path: Path, root: Path, exif: Dict[str, object]) -> Dict
         doc["image_datetime"] = path_info.date_value.isoformat().replace("+00:00", "Z") if path_info.date_value else None
         doc["date_specific"] = path_info.is_date_specific
 
+    return doc
+
+
+def _build_document_worker(args: Tuple[Path, int, Path]) -> Dict[str, object]:
+    file_path, file_size, root = args
+    return build_document(file_path, root, extract_exif(file_path), file_size)
+
+
+def add_location(doc: Dict[str, object]) -> None:
+    exif = doc.get("exif")
+    if not isinstance(exif, dict):
+        return
     coords = _extract_gps_coords(exif)
     if coords:
         lat, lon, alt = coords
@@ -277,7 +426,25 @@ def build_document(file_path: Path, root: Path, exif: Dict[str, object]) -> Dict
         elif err:
             doc["location_status"] = f"error: {err}"
 
-    return doc
+
+def fetch_existing_ids(collection: Collection) -> set:
+    cursor = collection.find({}, projection={"_id": 1}, batch_size=10_000).hint([("_id", 1)])
+    return {doc["_id"] for doc in cursor}
+
+
+def insert_batch(collection: Collection, batch: List[Dict[str, object]]) -> Tuple[int, int]:
+    # The server refuses bypass_document_validation for unacknowledged writes.
+    acknowledged = collection.write_concern.acknowledged
+    try:
+        result = collection.insert_many(batch, ordered=False, bypass_document_validation=acknowledged)
+        return len(result.inserted_ids), 0
+    except BulkWriteError as exc:
+        details = exc.details or {}
+        write_errors = details.get("writeErrors", [])
+        duplicates = sum(1 for err in write_errors if err.get("code") == DUPLICATE_KEY_ERROR)
+        if duplicates != len(write_errors):
+            raise
+        return int(details.get("nInserted", 0)), duplicates
 
 
 def format_eta(seconds: float) -> str:
@@ -299,30 +466,85 @@ def process_images(args: argparse.Namespace) -> None:
         raise FileNotFoundError(f"Root directory does not exist: {root}")
 
     collection = connect_collection(args.mongo_uri, args.db, args.collection)
+    if args.unacknowledged:
+        collection = collection.with_options(write_concern=WriteConcern(w=0))
     files = list(iter_image_files(root, args.extensions, args.include_hidden))
     total = len(files)
     logger.info("Found %d image files to process.", total)
 
-    start_time = time.time()
-    processed = inserted = skipped = 0
+    existing = fetch_existing_ids(collection)
+    logger.info("Collection already holds %d documents.", len(existing))
 
-    for file_path in files:
-        processed += 1
+    new_files = []
+    for file_path, file_size in files:
         pseudo_path = f"/{file_path.relative_to(root).as_posix()}"
+        if pseudo_path not in existing:
+            existing.add(pseudo_path)
+            new_files.append((file_path, file_size))
 
-        if collection.count_documents({"_id": pseudo_path}, limit=1):
-            skipped += 1
-        else:
-            exif = extract_exif(file_path)
-            doc = build_document(file_path, root, exif)
-            collection.insert_one(doc)
-            inserted += 1
-
-        elapsed = time.time() - start_time
-        rate = processed / elapsed if elapsed > 0 else 0
-        eta_seconds = (total - processed) / rate if rate > 0 else 0
-        percent = (processed / total) * 100
-        logger.info("Processed %d/%d (%.1f%%). ETA ~ %s", processed, total, percent, format_eta(eta_seconds))
+    load_geocode_cache(args.geocode_cache)
+    try:
+        _insert_new_files(args, collection, root, new_files, total)
+    finally:
+        save_geocode_cache(args.geocode_cache)
+
+
+def _build_documents(
+    executor: ProcessPoolExecutor, root: Path, new_files: List[Tuple[Path, int]], window: int
+) -> Iterator[Dict[str, object]]:
+    files = iter(new_files)
+    pending: Deque[Future] = deque()
+    while True:
+        while len(pending) < window:
+            item = next(files, None)
+            if item is None:
+                break
+            pending.append(executor.submit(_build_document_worker, (item[0], item[1], root)))
+        if not pending:
+            return
+        yield pending.popleft().result()
+
+
+def _insert_new_files(
+    args: argparse.Namespace,
+    collection: Collection,
+    root: Path,
+    new_files: List[Tuple[Path, int]],
+    total: int,
+) -> None:
+    start_time = time.time()
+    processed = skipped = total - len(new_files)
+    inserted = 0
+    batch: List[Dict[str, object]] = []
+    batch_size = max(1, args.batch_size)
+    logger.info("Skipping %d files already in the database.", skipped)
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=context) as executor:
+        try:
+            for done, doc in enumerate(_build_documents(executor, root, new_files, 4 * batch_size), start=1):
+                processed += 1
+                add_location(doc)
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    batch_inserted, batch_duplicates = insert_batch(collection, batch)
+                    inserted += batch_inserted
+                    skipped += batch_duplicates
+                    batch = []
+
+                elapsed = time.time() - start_time
+                rate = done / elapsed if elapsed > 0 else 0
+                eta_seconds = (len(new_files) - done) / rate if rate > 0 else 0
+                percent = (processed / total) * 100
+                logger.info("Processed %d/%d (%.1f%%). ETA ~ %s", processed, total, percent, format_eta(eta_seconds))
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    if batch:
+        batch_inserted, batch_duplicates = insert_batch(collection, batch)
+        inserted += batch_inserted
+        skipped += batch_duplicates
 
     logger.info("Done. Processed=%d, Inserted=%d, Skipped=%d", processed, inserted, skipped)
 
@@ -0,0 +1,53 @@
+import http.client
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app  # noqa: E402
+
+
+class SilentConnectionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        (root / "album").mkdir()
+        (root / "album" / "photo.jpg").write_bytes(b"\xff\xd8\xff\xd9")
+
+        handler_class = type("Handler", (app.ImageRequestHandler,), {"root_path": root})
+        handler_class.log_message = lambda *args: None
+        self.server = app.ImageServer(("127.0.0.1", 0), handler_class)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.sockets = []
+
+    def tearDown(self) -> None:
+        for sock in self.sockets:
+            sock.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self._tmp.cleanup()
+
+    def test_silent_sockets_do_not_hold_workers(self) -> None:
+        address = self.server.server_address
+        for _ in range(app.SERVER_WORKERS):
+            self.sockets.append(socket.create_connection(address))
+        time.sleep(0.2)
+
+        started = time.monotonic()
+        connection = http.client.HTTPConnection(*address, timeout=5)
+        connection.request("GET", "/api/list")
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+
+        self.assertEqual(response.status, 200)
+        self.assertLess(time.monotonic() - started, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()